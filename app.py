@@ -4,7 +4,8 @@ import uuid
 from datetime import datetime
 from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for
 from werkzeug.utils import secure_filename
-from pdf_processor import PDFProcessor
+from pdf_processor import PDFProcessor, OCR_MODES
+from ocr_backends import OCR_BACKENDS
 import magic
 
 app = Flask(__name__)
@@ -12,6 +13,8 @@ app.config['SECRET_KEY'] = 'your-secret-key-here'
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['PROCESSED_FOLDER'] = 'processed'
 app.config['MAX_CONTENT_LENGTH'] = 1000 * 1024 * 1024  # 1000MB max file size
+app.config['OCR_MODE'] = os.environ.get('OCR_MODE', 'full')  # full 或 multires
+app.config['OCR_BACKEND'] = os.environ.get('OCR_BACKEND', 'easyocr')  # easyocr、tesseract 或 onnx
 
 # 确保上传和处理目录存在
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -75,7 +78,7 @@ def preview_pdf(filename):
         return jsonify({'error': '文件不存在'}), 404
     
     try:
-        processor = PDFProcessor(filepath)
+        processor = PDFProcessor(filepath, ocr_backend=app.config['OCR_BACKEND'])
         preview_info = processor.get_preview_info()
         return jsonify(preview_info)
     except Exception as e:
@@ -88,8 +91,23 @@ def mask_pdf(filename):
     if not os.path.exists(filepath):
         return jsonify({'error': '文件不存在'}), 404
     
+    # 每个任务可通过JSON请求体选择OCR模式与后端，缺省使用全局配置
+    options = request.get_json(silent=True) or {}
+    if not isinstance(options, dict):
+        return jsonify({'error': '请求参数必须是JSON对象'}), 400
+    ocr_mode = options.get('ocr_mode', app.config['OCR_MODE'])
+    ocr_backend = options.get('ocr_backend', app.config['OCR_BACKEND'])
+    if ocr_mode not in OCR_MODES:
+        return jsonify({'error': f'不支持的OCR模式: {ocr_mode}'}), 400
+    if ocr_backend not in OCR_BACKENDS:
+        return jsonify({'error': f'不支持的OCR后端: {ocr_backend}'}), 400
+    
     try:
-        processor = PDFProcessor(filepath)
+        processor = PDFProcessor(filepath, ocr_mode=ocr_mode, ocr_backend=ocr_backend)
+        if processor.ocr_backend is None:
+            # 后端不可用时不能只做文本遮盖后报告成功，否则图片中的隐私信息会原样保留
+            processor.close()
+            return jsonify({'error': f'OCR后端不可用: {ocr_backend}'}), 500
         mask_result = processor.mask_privacy_info()
         
         # 保存处理后的文件
@@ -0,0 +1,86 @@
+"""OCR检测基准：在同一批PDF上对比不同OCR后端与模式的处理速度与检测召回率。
+
+以第一个后端整页识别（full）模式的检测结果为参照，统计其它组合找回的比例；
+该组合未在 --modes 中列出时也会运行。
+
+用法:
+    python benchmark_ocr.py sample1.pdf sample2.pdf --backends easyocr tesseract onnx --modes full multires
+"""
+import argparse
+import time
+from typing import Dict, List, Set, Tuple
+
+from pdf_processor import PDFProcessor, OCR_MODES
+from ocr_backends import OCR_BACKENDS, get_ocr_backend
+
+
+def _finding_keys(privacy_info: List[Dict]) -> Set[Tuple[str, str]]:
+    """以（类型, 值）作为检测结果的比对键，忽略坐标差异"""
+    return {(info['type'], str(info['value'])) for info in privacy_info}
+
+
+def run_mode(pdf_paths: List[str], mode: str, backend: str) -> Dict:
+    """按指定后端与模式检测所有PDF的图片隐私信息，返回耗时、页数与各页检测结果"""
+    findings = {}
+    pages = 0
+    elapsed = 0.0
+    for path in pdf_paths:
+        processor = PDFProcessor(path, ocr_mode=mode, ocr_backend=backend)
+        try:
+            for page_num in range(len(processor.doc)):
+                start = time.perf_counter()
+                privacy_info = processor.detect_image_privacy(page_num)
+                elapsed += time.perf_counter() - start
+                findings[(path, page_num)] = _finding_keys(privacy_info)
+                pages += 1
+        finally:
+            processor.close()
+    return {'pages': pages, 'elapsed': elapsed, 'findings': findings}
+
+
+def recall(reference: Dict, candidate: Dict) -> float:
+    """candidate 找回 reference 检测结果的比例；参照为空时记为1.0"""
+    total = hit = 0
+    for key, ref_items in reference['findings'].items():
+        cand_items = candidate['findings'].get(key, set())
+        total += len(ref_items)
+        hit += len(ref_items & cand_items)
+    return hit / total if total else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OCR模式速度与召回率基准')
+    parser.add_argument('pdfs', nargs='+', help='用于测试的PDF文件')
+    parser.add_argument('--modes', nargs='+', default=list(OCR_MODES), choices=OCR_MODES,
+                        help='参与对比的OCR模式')
+    parser.add_argument('--backends', nargs='+', default=['easyocr'], choices=list(OCR_BACKENDS),
+                        help='参与对比的OCR后端，第一个后端的full模式作为召回率参照')
+    args = parser.parse_args()
+
+    ref_combo = (args.backends[0], 'full')
+    combos = [ref_combo]
+    for backend in args.backends:
+        # 模型加载不计入耗时
+        if get_ocr_backend(backend) is None:
+            if backend == ref_combo[0]:
+                print(f"参照OCR后端无法加载: {backend}")
+                return
+            print(f"跳过无法加载的OCR后端: {backend}")
+            continue
+        combos.extend((backend, mode) for mode in args.modes if (backend, mode) != ref_combo)
+
+    stats = {combo: run_mode(args.pdfs, combo[1], combo[0]) for combo in combos}
+    reference = stats[ref_combo]
+    ref_rate = reference['pages'] / reference['elapsed'] if reference['elapsed'] else 0.0
+
+    print(f"{'后端':<12}{'模式':<10}{'页数':>6}{'耗时(s)':>10}{'页/秒':>8}{'加速比':>8}{'召回率':>8}")
+    for backend, mode in combos:
+        s = stats[(backend, mode)]
+        rate = s['pages'] / s['elapsed'] if s['elapsed'] else 0.0
+        speedup = rate / ref_rate if ref_rate else 0.0
+        print(f"{backend:<12}{mode:<10}{s['pages']:>6}{s['elapsed']:>10.2f}{rate:>8.2f}{speedup:>8.2f}"
+              f"{recall(reference, s):>8.2%}")
+
+
+if __name__ == '__main__':
+    main()
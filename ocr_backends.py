@@ -0,0 +1,194 @@
+"""可插拔的OCR后端。
+
+所有后端统一输入（图片路径或RGB numpy数组）与输出格式：
+- readtext(image)  -> [(bbox, text, confidence), ...]，bbox为四点多边形，confidence取值0~1
+- detect(image)    -> [(x0, y0, x1, y1), ...]，仅检测文本行
+- recognize(image) -> (text, confidence)，将整张图片作为单行文本识别
+"""
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ocr_layout import bbox_to_box
+
+try:
+    import easyocr
+except Exception:
+    easyocr = None
+
+try:
+    import pytesseract
+except Exception:
+    pytesseract = None
+
+try:
+    from rapidocr_onnxruntime import RapidOCR
+except Exception:
+    RapidOCR = None
+
+Box = Tuple[float, float, float, float]
+OCRResult = Tuple[Any, str, float]
+
+
+def _box_to_polygon(box: Box) -> List[List[float]]:
+    x0, y0, x1, y1 = box
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+class OCRBackend:
+    """OCR后端基类"""
+    name = ''
+
+    def readtext(self, image) -> List[OCRResult]:
+        raise NotImplementedError
+
+    def detect(self, image) -> List[Box]:
+        raise NotImplementedError
+
+    def recognize(self, image) -> Tuple[str, float]:
+        raise NotImplementedError
+
+
+class EasyOCRBackend(OCRBackend):
+    """EasyOCR（PyTorch）。在CPU上EasyOCR默认已对模型做动态int8量化"""
+    name = 'easyocr'
+
+    def __init__(self, langs=('ch_sim', 'en')):
+        if easyocr is None:
+            raise RuntimeError('未安装easyocr')
+        self.reader = easyocr.Reader(list(langs))
+
+    def readtext(self, image) -> List[OCRResult]:
+        return self.reader.readtext(image)
+
+    def detect(self, image) -> List[Box]:
+        horizontal_list, free_list = self.reader.detect(image)
+        boxes = []
+        for x_min, x_max, y_min, y_max in (horizontal_list[0] if horizontal_list else []):
+            boxes.append((float(x_min), float(y_min), float(x_max), float(y_max)))
+        for poly in (free_list[0] if free_list else []):
+            box = bbox_to_box([list(pt) for pt in poly])
+            if box is not None:
+                boxes.append(box)
+        return boxes
+
+    def recognize(self, image) -> Tuple[str, float]:
+        h, w = image.shape[:2]
+        recognized = self.reader.recognize(image, horizontal_list=[[0, w, 0, h]], free_list=[])
+        text = ''.join(r[1] for r in recognized)
+        confidence = min((float(r[2]) for r in recognized), default=0.0)
+        return text, confidence
+
+
+class TesseractBackend(OCRBackend):
+    """Tesseract（pytesseract）。Tesseract没有独立的检测阶段，detect会同时完成识别"""
+    name = 'tesseract'
+
+    def __init__(self, lang='chi_sim+eng'):
+        if pytesseract is None:
+            raise RuntimeError('未安装pytesseract')
+        pytesseract.get_tesseract_version()  # 未安装tesseract可执行文件时尽早失败
+        self.lang = lang
+
+    def _lines(self, image, config='') -> List[OCRResult]:
+        data = pytesseract.image_to_data(image, lang=self.lang, config=config,
+                                         output_type=pytesseract.Output.DICT)
+        lines: Dict[Tuple[int, int, int], Dict[str, Any]] = {}
+        for k in range(len(data['text'])):
+            word = (data['text'][k] or '').strip()
+            conf = float(data['conf'][k])
+            if not word or conf < 0:
+                continue
+            key = (data['block_num'][k], data['par_num'][k], data['line_num'][k])
+            x0, y0 = float(data['left'][k]), float(data['top'][k])
+            x1, y1 = x0 + float(data['width'][k]), y0 + float(data['height'][k])
+            line = lines.setdefault(key, {'words': [], 'confs': [], 'box': [x0, y0, x1, y1]})
+            line['words'].append(word)
+            line['confs'].append(conf / 100.0)
+            b = line['box']
+            line['box'] = [min(b[0], x0), min(b[1], y0), max(b[2], x1), max(b[3], y1)]
+        # 中文按字切词，直接拼接以便数字串与标签匹配
+        return [(_box_to_polygon(tuple(line['box'])), ''.join(line['words']),
+                 sum(line['confs']) / len(line['confs']))
+                for line in lines.values()]
+
+    def readtext(self, image) -> List[OCRResult]:
+        return self._lines(image)
+
+    def detect(self, image) -> List[Box]:
+        return [bbox_to_box(bbox) for (bbox, _, _) in self._lines(image)]
+
+    def recognize(self, image) -> Tuple[str, float]:
+        lines = self._lines(image, config='--psm 7')  # 单行文本
+        text = ''.join(text for (_, text, _) in lines)
+        confidence = min((conf for (_, _, conf) in lines), default=0.0)
+        return text, confidence
+
+
+class ONNXBackend(OCRBackend):
+    """ONNX Runtime CPU推理（rapidocr_onnxruntime，PaddleOCR中英文模型）"""
+    name = 'onnx'
+
+    def __init__(self):
+        if RapidOCR is None:
+            raise RuntimeError('未安装rapidocr_onnxruntime')
+        self.engine = RapidOCR()
+
+    @staticmethod
+    def _to_bgr(image):
+        # RapidOCR 将数组输入视为BGR，而本模块约定数组为RGB
+        if isinstance(image, np.ndarray) and image.ndim == 3 and image.shape[2] == 3:
+            return cv2.cvtColor(np.ascontiguousarray(image), cv2.COLOR_RGB2BGR)
+        return image
+
+    def readtext(self, image) -> List[OCRResult]:
+        result, _ = self.engine(self._to_bgr(image))
+        return [([list(map(float, pt)) for pt in bbox], text, float(score))
+                for (bbox, text, score) in (result or [])]
+
+    def detect(self, image) -> List[Box]:
+        result, _ = self.engine(self._to_bgr(image), use_det=True, use_cls=False, use_rec=False)
+        boxes = []
+        for poly in (result or []):
+            box = bbox_to_box([list(map(float, pt)) for pt in poly])
+            if box is not None:
+                boxes.append(box)
+        return boxes
+
+    def recognize(self, image) -> Tuple[str, float]:
+        result, _ = self.engine(self._to_bgr(image), use_det=False, use_cls=False, use_rec=True)
+        if not result:
+            return '', 0.0
+        text = ''.join(r[0] for r in result)
+        confidence = min(float(r[1]) for r in result)
+        return text, confidence
+
+
+OCR_BACKENDS = {
+    EasyOCRBackend.name: EasyOCRBackend,
+    TesseractBackend.name: TesseractBackend,
+    ONNXBackend.name: ONNXBackend,
+}
+
+# 已加载的后端按名称缓存，同一进程内的任务共享模型；加载失败记为None，不反复重试
+_backend_cache: Dict[str, Optional[OCRBackend]] = {}
+# 按后端名称分别加锁，加载某个后端时不阻塞对其它已缓存后端的获取
+_backend_locks = {name: threading.Lock() for name in OCR_BACKENDS}
+
+
+def get_ocr_backend(name: str = 'easyocr') -> Optional[OCRBackend]:
+    """获取（必要时加载）指定名称的OCR后端；加载失败返回None"""
+    if name not in OCR_BACKENDS:
+        raise ValueError(f"不支持的OCR后端: {name}")
+    if name in _backend_cache:
+        return _backend_cache[name]
+    with _backend_locks[name]:
+        if name not in _backend_cache:
+            try:
+                _backend_cache[name] = OCR_BACKENDS[name]()
+            except Exception as e:
+                print(f"OCR初始化失败 ({name}): {e}")
+                _backend_cache[name] = None
+        return _backend_cache[name]
@@ -0,0 +1,210 @@
+import re
+from statistics import median
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+Box = Tuple[float, float, float, float]
+
+# 半角字符（数字、字母、标点）在版面上约占全角汉字一半宽度
+_HALF_WIDTH_RE = re.compile(r'[\x00-\x7f]')
+
+
+def bbox_to_box(bbox: Any) -> Optional[Box]:
+    """将OCR边界框（四点多边形或[x1,y1,x2,y2]）转换为轴对齐矩形"""
+    if isinstance(bbox, (list, tuple)) and len(bbox) == 4:
+        if all(isinstance(pt, (list, tuple)) and len(pt) == 2 for pt in bbox):
+            xs = [float(pt[0]) for pt in bbox]
+            ys = [float(pt[1]) for pt in bbox]
+            return min(xs), min(ys), max(xs), max(ys)
+        if all(isinstance(val, (int, float)) for val in bbox):
+            x1, y1, x2, y2 = map(float, bbox)
+            return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+    return None
+
+
+def _char_width(ch: str) -> float:
+    return 0.5 if _HALF_WIDTH_RE.match(ch) else 1.0
+
+
+class OCRLayoutIndex:
+    """OCR结果的版面索引：网格空间索引 + 文本行分组。
+
+    每页构建一次，之后的近邻查询（标签右侧的值、姓名附近的关键词等）
+    只访问查询窗口覆盖的网格单元，整页检测为线性复杂度。
+    """
+
+    def __init__(self, results: Iterable[Tuple[Any, str, float]], min_conf: float = 0.0,
+                 column_gap_lines: float = 3.0):
+        self.column_gap_lines = column_gap_lines
+        self.items: List[Dict[str, Any]] = []
+        for (bbox, text, confidence) in results:
+            if confidence < min_conf:
+                continue
+            box = bbox_to_box(bbox)
+            if box is None:
+                continue
+            self.items.append({
+                'bbox': bbox,
+                'box': box,
+                'text': text or '',
+                'confidence': confidence,
+                'line': -1
+            })
+
+        heights = [it['box'][3] - it['box'][1] for it in self.items]
+        self.line_height = max(1.0, median(heights)) if heights else 1.0
+        self.cell_size = 2.0 * self.line_height
+
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        for i, it in enumerate(self.items):
+            for cell in self._cells(it['box']):
+                self._grid.setdefault(cell, []).append(i)
+
+        self.lines: List[List[int]] = []
+        self._group_lines()
+
+    def _cells(self, box: Box) -> Iterable[Tuple[int, int]]:
+        x0, y0, x1, y1 = box
+        cs = self.cell_size
+        for cx in range(int(x0 // cs), int(x1 // cs) + 1):
+            for cy in range(int(y0 // cs), int(y1 // cs) + 1):
+                yield cx, cy
+
+    def _group_lines(self):
+        """按垂直中心排序后贪心合并为文本行，行内按x坐标排序。
+        同一行内水平间距超过 column_gap_lines 个行高处拆分（分栏、并排放置的证件正反面）。
+        """
+        order = sorted(range(len(self.items)),
+                       key=lambda i: (self.items[i]['box'][1] + self.items[i]['box'][3]) / 2.0)
+        line_y0 = line_y1 = 0.0
+        for i in order:
+            x0, y0, x1, y1 = self.items[i]['box']
+            if self.lines:
+                overlap = min(line_y1, y1) - max(line_y0, y0)
+                if overlap > 0.5 * min(line_y1 - line_y0, y1 - y0):
+                    self.lines[-1].append(i)
+                    line_y0, line_y1 = min(line_y0, y0), max(line_y1, y1)
+                    continue
+            self.lines.append([i])
+            line_y0, line_y1 = y0, y1
+
+        max_gap = self.column_gap_lines * self.line_height
+        segments: List[List[int]] = []
+        for line in self.lines:
+            line.sort(key=lambda i: self.items[i]['box'][0])
+            right = None
+            for i in line:
+                x0, _, x1, _ = self.items[i]['box']
+                if right is None or x0 - right > max_gap:
+                    segments.append([])
+                    right = x1
+                segments[-1].append(i)
+                right = max(right, x1)
+        self.lines = segments
+        for line_no, line in enumerate(self.lines):
+            for i in line:
+                self.items[i]['line'] = line_no
+
+    def query(self, box: Box) -> List[int]:
+        """返回与矩形区域相交的OCR框索引"""
+        qx0, qy0, qx1, qy1 = box
+        found = set()
+        for cell in self._cells(box):
+            for i in self._grid.get(cell, ()):
+                if i in found:
+                    continue
+                x0, y0, x1, y1 = self.items[i]['box']
+                if x0 <= qx1 and x1 >= qx0 and y0 <= qy1 and y1 >= qy0:
+                    found.add(i)
+        return sorted(found)
+
+    def neighbors(self, i: int, dx: float, dy: float) -> List[int]:
+        """返回第i个框向外扩展(dx, dy)范围内的其它框"""
+        x0, y0, x1, y1 = self.items[i]['box']
+        return [j for j in self.query((x0 - dx, y0 - dy, x1 + dx, y1 + dy)) if j != i]
+
+    def has_keyword_near(self, i: int, keywords: Sequence[str], min_conf: float = 0.3,
+                         dx_lines: float = 8.0, dy_lines: float = 1.5) -> bool:
+        """判断第i个框附近（按行高计的窗口）是否出现关键词"""
+        h = self.items[i]['box'][3] - self.items[i]['box'][1]
+        for j in self.neighbors(i, dx_lines * h, dy_lines * h):
+            if self.items[j]['confidence'] <= min_conf:
+                continue
+            if any(k in self.items[j]['text'] for k in keywords):
+                return True
+        return False
+
+    def _value_run(self, line: List[int], start: int, right: float, h: float,
+                   is_label: Optional[Callable[[str], bool]], max_gap: float) -> List[int]:
+        """从line[start]起向右收集值框，遇到标签样式的框或水平间距过大时结束"""
+        run = []
+        for j in line[start:]:
+            x0, _, x1, _ = self.items[j]['box']
+            if x0 - right > max_gap * h:
+                break
+            if is_label is not None and is_label(self.items[j]['text']):
+                break
+            run.append(j)
+            right = max(right, x1)
+        return run
+
+    def value_boxes(self, i: int, follow_lines: int = 0, anchor_x: Optional[float] = None,
+                    is_label: Optional[Callable[[str], bool]] = None, max_gap_lines: float = 1.5) -> List[int]:
+        """返回标签框右侧同一行的值框；follow_lines>0时追加下方与值左对齐的续行。
+
+        值在下一个标签样式的框（由 is_label 判定）或水平间距超过 max_gap_lines 个行高处结束。
+        anchor_x 为值起点的x坐标，用于标签与值同在第i个框内的情况：此时值已包含在该框中，
+        只返回从anchor_x对齐的续行；缺省时以右侧第一个值框的左边界对齐。
+        """
+        it = self.items[i]
+        h = it['box'][3] - it['box'][1]
+        if anchor_x is None:
+            line = self.lines[it['line']]
+            result = self._value_run(line, line.index(i) + 1, it['box'][2], h, is_label, max_gap_lines)
+            if not result:
+                return result
+            anchor_x = self.items[result[0]]['box'][0]
+        else:
+            result = []
+        if follow_lines <= 0:
+            return result
+
+        last_y1 = max(self.items[j]['box'][3] for j in [i] + result)
+        for _ in range(follow_lines):
+            below = [j for j in self.query((anchor_x - h, last_y1, anchor_x + h, last_y1 + h))
+                     if self.items[j]['box'][1] >= last_y1 - 0.5 * h
+                     and abs(self.items[j]['box'][0] - anchor_x) <= h]
+            if not below:
+                break
+            first = min(below, key=lambda j: self.items[j]['box'][0])
+            cont_line = self.lines[self.items[first]['line']]
+            start = cont_line.index(first)
+            cont = self._value_run(cont_line, start, self.items[cont_line[start]]['box'][0], h,
+                                   is_label, max_gap_lines)
+            if not cont:
+                break
+            result.extend(cont)
+            last_y1 = max(self.items[j]['box'][3] for j in cont)
+        return result
+
+    def span_box(self, i: int, start: int, end: int) -> Box:
+        """按字符宽度（全角/半角加权）估算文本[start:end]在框内的水平范围"""
+        x0, y0, x1, y1 = self.items[i]['box']
+        text = self.items[i]['text']
+        widths = [_char_width(ch) for ch in text]
+        total = sum(widths)
+        if total <= 0:
+            return x0, y0, x1, y1
+        left = sum(widths[:start]) / total
+        right = sum(widths[:end]) / total
+        return x0 + left * (x1 - x0), y0, x0 + right * (x1 - x0), y1
+
+    def union_box(self, indices: Sequence[int]) -> Optional[Box]:
+        boxes = [self.items[j]['box'] for j in indices]
+        if not boxes:
+            return None
+        return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+    def page_text(self) -> str:
+        """按阅读顺序拼接整页文本"""
+        return '\n'.join(' '.join(self.items[i]['text'] for i in line) for line in self.lines)
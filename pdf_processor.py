@@ -4,11 +4,12 @@ import fitz  # PyMuPDF
 from PIL import Image
 import numpy as np
 import cv2
-import easyocr
 from pdf2image import convert_from_path
 import tempfile
 import json
 from typing import List, Tuple, Dict, Any, Optional
+from ocr_layout import OCRLayoutIndex, bbox_to_box
+from ocr_backends import OCRBackend, get_ocr_backend
 
 # 修复Pillow 10.0+的ANTIALIAS问题
 try:
@@ -25,10 +26,20 @@ except Exception:
     zbar_decode = None
     ZBarSymbol = None
 
+# OCR模式：full 为整页识别；multires 为低分辨率检测 + 候选行高分辨率识别
+OCR_MODES = ('full', 'multires')
+
+
 class PDFProcessor:
-    def __init__(self, pdf_path):
-        """初始化PDF处理器"""
+    def __init__(self, pdf_path, ocr_mode='full', ocr_backend='easyocr'):
+        """初始化PDF处理器
+
+        ocr_backend 可以是后端名称（见 ocr_backends.OCR_BACKENDS）或已加载的 OCRBackend 实例
+        """
+        if ocr_mode not in OCR_MODES:
+            raise ValueError(f"不支持的OCR模式: {ocr_mode}")
         self.pdf_path = pdf_path
+        self.ocr_mode = ocr_mode
         self.doc = fitz.open(pdf_path)
         self.mask_results = {
             'total_found': 0,
@@ -37,12 +48,13 @@ class PDFProcessor:
             'details': []
         }
         
-        # 初始化OCR读取器
-        try:
-            self.ocr_reader = easyocr.Reader(['ch_sim', 'en'])
-        except Exception as e:
-            print(f"OCR初始化失败: {e}")
-            self.ocr_reader = None
+        # 初始化OCR后端（按名称获取时在进程内复用已加载的模型）
+        if isinstance(ocr_backend, OCRBackend):
+            self.ocr_backend = ocr_backend
+        else:
+            self.ocr_backend = get_ocr_backend(ocr_backend)
+        if self.ocr_backend is None:
+            print(f"OCR后端不可用，将跳过图片中的隐私信息检测: {ocr_backend}")
         
         # 隐私信息正则表达式与关键词
         self.patterns = {
@@ -54,6 +66,22 @@ class PDFProcessor:
             'name': r'[\u4e00-\u9fa5]{2,4}',  # 中文姓名（备用，但需要上下文验证）
         }
 
+        # 证件/表格中常见的字段标签，用于确定标签值的结束位置
+        self.field_labels = ['姓名', '性别', '民族', '出生', '住址', '公民身份', '职务', '职称', '联系电话',
+                             '电话', '手机', '年龄', '学历', '籍贯', '工作单位', '证书编号', '签发机关', '有效期']
+
+        # 多分辨率OCR参数：宽高比按行高归一化（汉字约1.0，数字约0.5~0.6）
+        self.multires_config = {
+            'low_dpi': 100,             # 文本行检测的渲染分辨率
+            'high_dpi': 300,            # 候选行识别的渲染分辨率
+            'crop_padding': 0.15,       # 裁剪时按行高外扩的比例
+            'min_height_ratio': 0.4,    # 行高低于中位数该倍数视为噪点
+            'max_height_ratio': 2.5,    # 行高高于中位数该倍数视为标题/图形
+            'title_max_aspect': 12.0,   # 过高的行中较短的视为标题（如“居民身份证”“…证书”），保留用于关键词判断
+            'label_max_aspect': 3.5,    # 短行（标签/姓名，约2~4个汉字）
+            'digit_max_aspect': 22.0,   # 数字串（身份证/手机号/社保号/条码号，最长约32位）
+        }
+
         # 章节关键词
         self.section_keywords = {
             'tech_plan': ['技术方案', '技术实施方案', '技术标'],
@@ -164,7 +192,11 @@ class PDFProcessor:
         try:
             # 将PDF页面转换为图片
             with tempfile.TemporaryDirectory() as temp_dir:
-                images = convert_from_path(self.pdf_path, first_page=page_num+1, last_page=page_num+1)
+                if self.ocr_mode == 'multires':
+                    images = convert_from_path(self.pdf_path, dpi=self.multires_config['low_dpi'],
+                                               first_page=page_num+1, last_page=page_num+1)
+                else:
+                    images = convert_from_path(self.pdf_path, first_page=page_num+1, last_page=page_num+1)
                 if not images:
                     return privacy_info
                 
@@ -173,96 +205,39 @@ class PDFProcessor:
                 image.save(image_path, 'PNG')
                 img_w, img_h = image.size
                 
-                # 使用OCR检测图片中的文字
-                if self.ocr_reader:
-                    results = self.ocr_reader.readtext(image_path)
-                    
-                    for (bbox, text, confidence) in results:
-                        if confidence > 0.5:  # 置信度阈值
-                            # 检测身份证号码
-                            id_matches = re.finditer(self.patterns['id_card'], text)
-                            for match in id_matches:
-                                privacy_info.append({
-                                    'type': '身份证号码(图片)',
-                                    'value': match.group(),
-                                    'bbox': bbox,
-                                    'img_size': (img_w, img_h),
-                                    'confidence': confidence,
-                                    'pattern': 'image'
-                                })
-                            
-                            # 身份证标签行：只遮盖“住址/公民身份证号”右侧的值，避免遮盖照片
-                            try:
-                                label_keys = [
-                                    ('住址', '住址'),
-                                    ('公民身份号码', '公民身份号码'),
-                                    ('公民身份证号', '公民身份证号')
-                                ]
-                                for key_text, label_name in label_keys:
-                                    if key_text in text and len(text) > len(key_text) + 1:
-                                        privacy_info.append({
-                                            'type': f'{label_name}(图片值)',
-                                            'value': text,
-                                            'bbox': bbox,
-                                            'img_size': (img_w, img_h),
-                                            'confidence': confidence,
-                                            'pattern': 'image',
-                                            'value_right': True,
-                                            'label_len': len(key_text),
-                                            'text_len': len(text)
-                                        })
-                            except Exception:
-                                pass
-                            
-                            # 检测手机号码
-                            phone_matches = re.finditer(self.patterns['phone'], text)
-                            for match in phone_matches:
-                                privacy_info.append({
-                                    'type': '手机号码(图片)',
-                                    'value': match.group(),
-                                    'bbox': bbox,
-                                    'img_size': (img_w, img_h),
-                                    'confidence': confidence,
-                                    'pattern': 'image'
-                                })
-                            
-                            # 检测姓名（仅在身份证/证书上下文中）
-                            if len(text) >= 2 and len(text) <= 4:
-                                if re.match(r'^[\u4e00-\u9fa5]+$', text):
-                                    # 检查上下文是否包含身份证或证书相关关键词
-                                    context_keywords = ['姓名', '身份证', '证书', '持证人', '申请人']
-                                    # 获取周围文本作为上下文
-                                    context_text = ""
-                                    for (ctx_bbox, ctx_text, ctx_conf) in results:
-                                        if ctx_conf > 0.3:  # 降低置信度要求获取更多上下文
-                                            context_text += ctx_text + " "
-                                    
-                                    # 只有在包含相关关键词时才遮盖姓名
-                                    if any(keyword in context_text for keyword in context_keywords):
-                                        privacy_info.append({
-                                            'type': '姓名(图片)',
-                                            'value': text,
-                                            'bbox': bbox,
-                                            'img_size': (img_w, img_h),
-                                            'confidence': confidence,
-                                            'pattern': 'image'
-                                        })
+                # 使用OCR检测图片中的文字，并构建版面索引供近邻查询
+                results = []
+                if self.ocr_backend:
+                    if self.ocr_mode == 'multires':
+                        results = self._multires_readtext(page_num, image_path, (img_w, img_h))
+                    else:
+                        results = self.ocr_backend.readtext(image_path)
+                layout = OCRLayoutIndex(results)
+                privacy_info.extend(self._detect_ocr_privacy(layout, (img_w, img_h)))
 
                 # 二维码 & 条形码检测（仅在证书/身份证上下文中，且必须有实际图像）
                 try:
                     # 检查页面是否包含证书或身份证相关关键词
-                    page_text = ""
-                    for (_, text, _) in results:
-                        page_text += text + " "
+                    page_text = layout.page_text()
                     
                     # 只有在包含相关关键词时才检测二维码/条形码
                     cert_keywords = ['证书', '身份证', '持证人', '二维码', '条码', '验证码']
                     should_detect_codes = any(keyword in page_text for keyword in cert_keywords)
                     
                     if should_detect_codes:
+                        # 多分辨率模式的检测图分辨率过低，条码难以解码：识码使用高分辨率重新渲染的整页
+                        code_path, code_size = image_path, (img_w, img_h)
+                        if self.ocr_mode == 'multires':
+                            code_images = convert_from_path(self.pdf_path, dpi=self.multires_config['high_dpi'],
+                                                            first_page=page_num+1, last_page=page_num+1)
+                            if not code_images:
+                                return privacy_info
+                            code_path = os.path.join(temp_dir, f'page_{page_num}_codes.png')
+                            code_images[0].save(code_path, 'PNG')
+                            code_size = code_images[0].size
                         # OpenCV QR 检测
                         qr_detector = cv2.QRCodeDetector()
-                        img_cv = cv2.imread(image_path)
+                        img_cv = cv2.imread(code_path)
                         if img_cv is not None:
                             data, points, _ = qr_detector.detectAndDecode(img_cv)
                             # 必须有数据且检测到实际二维码图像才遮盖
@@ -272,13 +247,13 @@ class PDFProcessor:
                                     'type': '二维码',
                                     'value': data,
                                     'bbox': pts,
-                                    'img_size': (img_w, img_h),
+                                    'img_size': code_size,
                                     'confidence': 0.99,
                                     'pattern': 'image'
                                 })
                         # pyzbar 条形码/二维码检测
                         if zbar_decode is not None:
-                            img_pil = Image.open(image_path).convert('RGB')
+                            img_pil = Image.open(code_path).convert('RGB')
                             # 仅检测常见码制，避免触发zbar的DataBar断言警告
                             symbols = None
                             if ZBarSymbol is not None:
@@ -305,7 +280,7 @@ class PDFProcessor:
                                         'type': '条形码/二维码',
                                         'value': obj.data.decode('utf-8', errors='ignore'),
                                         'bbox': bbox,
-                                        'img_size': (img_w, img_h),
+                                        'img_size': code_size,
                                         'confidence': 0.99,
                                         'pattern': 'image'
                                     })
@@ -317,6 +292,169 @@ class PDFProcessor:
         
         return privacy_info
     
+    def _select_candidate_lines(self, boxes: List[Tuple[float, float, float, float]]) -> List[Tuple[float, float, float, float]]:
+        """按形状与标签启发式筛选值得高分辨率识别的文本行。
+        - 丢弃过矮（噪点）的行；过高的行仅保留较短的标题行，供证书/身份证关键词判断
+        - 保留短行（标签/姓名）与数字串长度范围内的行
+        - 更长的行（正文段落）仅在同一行左侧有短标签时保留（如“住址 xxx”）
+        """
+        cfg = self.multires_config
+        layout = OCRLayoutIndex([(list(box), '', 1.0) for box in boxes])
+        h_med = layout.line_height
+        selected = set()
+        for line in layout.lines:
+            seen_label = False
+            for i in line:
+                x0, y0, x1, y1 = layout.items[i]['box']
+                h = y1 - y0
+                if h < cfg['min_height_ratio'] * h_med:
+                    continue
+                aspect = (x1 - x0) / max(h, 1.0)
+                if h > cfg['max_height_ratio'] * h_med:
+                    if aspect <= cfg['title_max_aspect']:
+                        selected.add(i)
+                    continue
+                if aspect <= cfg['label_max_aspect']:
+                    seen_label = True
+                    selected.add(i)
+                elif aspect <= cfg['digit_max_aspect'] or seen_label:
+                    selected.add(i)
+        return [layout.items[i]['box'] for i in sorted(selected)]
+
+    def _multires_readtext(self, page_num: int, image_path: str,
+                           img_size: Tuple[int, int]) -> List[Tuple[Any, str, float]]:
+        """低分辨率整页检测文本行，仅对候选行按高分辨率重新渲染并识别。
+        返回与 readtext 相同的 (bbox, text, confidence) 列表，坐标为低分辨率图像像素。
+        """
+        cfg = self.multires_config
+        boxes = self.ocr_backend.detect(image_path)
+        if not boxes:
+            return []
+
+        page = self.doc[page_num]
+        img_w, img_h = img_size
+        scale_x = float(page.rect.width) / float(img_w)
+        scale_y = float(page.rect.height) / float(img_h)
+        results = []
+        for box in self._select_candidate_lines(boxes):
+            x0, y0, x1, y1 = box
+            pad = cfg['crop_padding'] * (y1 - y0)
+            clip = fitz.Rect((x0 - pad) * scale_x, (y0 - pad) * scale_y,
+                             (x1 + pad) * scale_x, (y1 + pad) * scale_y) & page.rect
+            if clip.is_empty:
+                continue
+            pix = page.get_pixmap(clip=clip, dpi=cfg['high_dpi'], alpha=False)
+            crop = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
+            text, confidence = self.ocr_backend.recognize(crop)
+            results.append(([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], text, confidence))
+        return results
+
+    def _value_end(self, text: str, start: int) -> int:
+        """标签与值同框时，值在下一个字段标签（或“xx：”形式的标签）之前结束"""
+        end = len(text)
+        for label in self.field_labels:
+            k = text.find(label, start)
+            if k >= 0:
+                end = min(end, k)
+        m = re.compile(r'[:：]').search(text, start, end)
+        if m:
+            # 冒号前的标签词以空白与值分隔
+            space = max(text.rfind(' ', start, m.start()), text.rfind('\u3000', start, m.start()))
+            end = space if space >= 0 else start
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return end
+
+    def _detect_ocr_privacy(self, layout: OCRLayoutIndex, img_size: Tuple[int, int]) -> List[Dict[str, Any]]:
+        """基于版面索引检测OCR文字中的隐私信息，遮盖框尽量收紧到值本身"""
+        privacy_info = []
+
+        def add(info_type, value, box, confidence):
+            privacy_info.append({
+                'type': info_type,
+                'value': value,
+                'bbox': list(box),
+                'img_size': img_size,
+                'confidence': confidence,
+                'pattern': 'image'
+            })
+
+        # 标签：只遮盖“姓名/住址/公民身份号码”等右侧的值，避免遮盖照片；住址允许跨行
+        # (标签, 续行数, 值是否必须是紧随分隔符的2~4字姓名)
+        label_keys = [
+            ('姓名', 0, False),
+            ('持证人', 0, True),
+            ('申请人', 0, True),
+            ('住址', 2, False),
+            ('公民身份号码', 0, False),
+            ('公民身份证号', 0, False)
+        ]
+        name_keywords = ['姓名', '身份证', '证书', '持证人', '申请人']
+        name_re = r'[\u4e00-\u9fa5]{2,4}'
+
+        def is_label(t):
+            t = t.strip()
+            return t.endswith((':', '：')) or any(t.startswith(k) for k in self.field_labels)
+
+        for i, item in enumerate(layout.items):
+            text = item['text']
+            confidence = item['confidence']
+            if confidence <= 0.5:  # 置信度阈值
+                continue
+
+            # 检测身份证号码、手机号码
+            for ptn, info_type in [(self.patterns['id_card'], '身份证号码(图片)'),
+                                   (self.patterns['phone'], '手机号码(图片)')]:
+                for match in re.finditer(ptn, text):
+                    add(info_type, match.group(), layout.span_box(i, match.start(), match.end()), confidence)
+
+            try:
+                for key_text, follow_lines, name_only in label_keys:
+                    pos = text.find(key_text)
+                    if pos < 0:
+                        continue
+                    label_end = pos + len(key_text)
+                    value_start = label_end
+                    while value_start < len(text) and text[value_start] in ':： ':
+                        value_start += 1
+                    if value_start < len(text):
+                        # 标签与值在同一个OCR框内：按字符宽度切出值部分（到下一个字段标签为止），并追加与值起点对齐的续行
+                        value_end = self._value_end(text, value_start)
+                        value = text[value_start:value_end]
+                        if not value:
+                            continue
+                        if name_only and not (text[label_end] in ':：' and re.fullmatch(name_re, value)):
+                            continue
+                        span = layout.span_box(i, value_start, value_end)
+                        cont_idx = layout.value_boxes(i, follow_lines=follow_lines, anchor_x=span[0],
+                                                      is_label=is_label)
+                        cont_box = layout.union_box(cont_idx)
+                        box = span if cont_box is None else (
+                            min(span[0], cont_box[0]), span[1], max(span[2], cont_box[2]), cont_box[3])
+                        value += ''.join(layout.items[j]['text'] for j in cont_idx)
+                        add(f'{key_text}(图片值)', value, box, confidence)
+                    elif value_start == len(text):
+                        # 标签单独成框：取同一行右侧（及续行）的值框，到下一个标签或较大间距为止
+                        value_idx = layout.value_boxes(i, follow_lines=follow_lines, is_label=is_label)
+                        box = layout.union_box(value_idx)
+                        if box is None:
+                            continue
+                        value = ''.join(layout.items[j]['text'] for j in value_idx)
+                        if name_only and not re.fullmatch(name_re, value):
+                            continue
+                        add(f'{key_text}(图片值)', value, box, confidence)
+            except Exception:
+                pass
+
+            # 检测姓名（仅在附近出现身份证/证书相关关键词时）；含关键词的框（“资格证书”等）与字段标签不是姓名
+            if 2 <= len(text) <= 4 and re.match(r'^[\u4e00-\u9fa5]+$', text):
+                if any(k in text for k in name_keywords) or is_label(text):
+                    continue
+                if layout.has_keyword_near(i, name_keywords):
+                    add('姓名(图片)', text, item['box'], confidence)
+
+        return privacy_info
+
     def _rect_overlap_ratio(self, a: fitz.Rect, b: fitz.Rect) -> float:
         inter = a & b
         if inter.is_empty or a.is_empty:
@@ -414,20 +552,11 @@ class PDFProcessor:
                         scale_x = 1.0
                         scale_y = 1.0
 
-                    x1_img = y1_img = x2_img = y2_img = None
-
-                    # EasyOCR 通常返回四点多边形：[[x1,y1],[x2,y2],[x3,y3],[x4,y4]]
-                    if isinstance(bbox, (list, tuple)) and len(bbox) == 4:
-                        if all(isinstance(pt, (list, tuple)) and len(pt) == 2 for pt in bbox):
-                            xs = [float(pt[0]) for pt in bbox]
-                            ys = [float(pt[1]) for pt in bbox]
-                            x1_img, y1_img = min(xs), min(ys)
-                            x2_img, y2_img = max(xs), max(ys)
-                        elif all(isinstance(val, (int, float)) for val in bbox):
-                            x1_img, y1_img, x2_img, y2_img = map(float, bbox)
-
-                    if None in (x1_img, y1_img, x2_img, y2_img):
+                    # EasyOCR 通常返回四点多边形：[[x1,y1],[x2,y2],[x3,y3],[x4,y4]]，版面索引返回[x1,y1,x2,y2]
+                    box = bbox_to_box(bbox)
+                    if box is None:
                         raise ValueError(f"无法解析bbox格式: {bbox}")
+                    x1_img, y1_img, x2_img, y2_img = box
 
                     # 缩放到PDF坐标
                     x1 = x1_img * scale_x
@@ -443,20 +572,6 @@ class PDFProcessor:
 
                     rect = fitz.Rect(float(x1), float(y1), float(x2), float(y2))
                     
-                    # 如果是标签行，仅遮盖右侧的值部分，限制遮盖宽度，避免遮住身份证照片
-                    if info.get('value_right'):
-                        label_len = max(1, int(info.get('label_len', 2)))
-                        text_len = max(label_len + 1, int(info.get('text_len', label_len + 5)))
-                        # 估算值区域起点（在bbox内部向右偏移）
-                        ratio = min(0.85, max(0.1, (label_len + 1) / float(text_len)))
-                        new_x1 = rect.x0 + ratio * (rect.x1 - rect.x0)
-                        # 限制遮盖区域最大宽度为原bbox的60%，避免大范围遮挡
-                        max_width = 0.6 * (rect.x1 - rect.x0)
-                        if rect.x1 - new_x1 > max_width:
-                            rect = fitz.Rect(new_x1, rect.y0, new_x1 + max_width, rect.y1)
-                        else:
-                            rect = fitz.Rect(new_x1, rect.y0, rect.x1, rect.y1)
-                    
                     # 保护电子印章：若大幅重叠则跳过
                     protect_regions = self._detect_seal_regions(page)
                     if any(self._rect_overlap_ratio(rect, pr) > 0.5 for pr in protect_regions):
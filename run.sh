@@ -57,5 +57,11 @@ echo "访问地址: http://localhost:6001"
 echo "按 Ctrl+C 停止应用"
 echo ""
 
-python3 app.py
+# ./run.sh --production 以多进程生产模式启动（参数见 python3 serve.py --help）
+if [[ "$1" == "--production" ]]; then
+    shift
+    python3 serve.py "$@"
+else
+    python3 app.py
+fi
 
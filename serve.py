@@ -0,0 +1,217 @@
+"""生产模式服务：主进程预加载OCR模型后fork多个工作进程。
+
+工作进程通过写时复制（copy-on-write）共享主进程中已加载的模型权重，
+每个工作进程使用固定大小的线程池处理请求，处理一定数量的遮盖任务后自动退出并由主进程重新拉起，
+收到 SIGTERM/SIGINT 时停止接收新连接，等待进行中的遮盖任务完成后退出。
+
+用法:
+    python serve.py --workers 4 --threads 2 --max-jobs 200
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from werkzeug.serving import BaseWSGIServer
+
+from app import app
+from ocr_backends import get_ocr_backend
+
+
+class PoolWSGIServer(BaseWSGIServer):
+    """使用固定大小线程池处理请求的WSGI服务器。
+    线程全部繁忙时不再accept，新连接留在内核队列中由其它工作进程接收。
+    """
+    multithread = True
+    poll_interval = 0.5
+
+    def __init__(self, host, port, wsgi_app, threads, request_timeout, fd=None):
+        super().__init__(host, port, wsgi_app, fd=fd)
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.slots = threading.BoundedSemaphore(threads)
+        self.futures = set()
+        self.stopping = False
+        # 已接收连接的读写超时：空闲连接（如浏览器预连接）不能一直占用线程槽位
+        self.request_timeout = request_timeout
+        # 监听套接字设为非阻塞：等到空闲槽位时连接可能已被其它工作进程接收，accept不能因此卡住
+        self.socket.setblocking(False)
+
+    def get_request(self):
+        # 先占用槽位再accept，线程全部繁忙时连接留在内核队列中；开始关闭后不再accept
+        while not self.slots.acquire(timeout=self.poll_interval):
+            if self.stopping:
+                raise OSError('服务正在关闭')
+        try:
+            if self.stopping:
+                raise OSError('服务正在关闭')
+            request, client_address = super().get_request()
+        except Exception:
+            self.slots.release()
+            raise
+        request.settimeout(self.request_timeout)
+        return request, client_address
+
+    def process_request(self, request, client_address):
+        try:
+            future = self.executor.submit(self._process_request_thread, request, client_address)
+        except Exception:
+            self.slots.release()
+            raise
+        self.futures.add(future)
+        future.add_done_callback(self.futures.discard)
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def stop(self):
+        """停止接收新连接；shutdown() 会等待 serve_forever 循环退出，因此在单独线程中调用"""
+        if not self.stopping:
+            self.stopping = True
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def drain(self, timeout: float) -> bool:
+        """等待已接收的请求处理完成，最多等待timeout秒；全部完成返回True"""
+        _, not_done = wait(list(self.futures), timeout=timeout)
+        self.executor.shutdown(wait=False)
+        return not not_done
+
+
+class Worker:
+    """工作进程：处理请求，达到任务上限或收到终止信号后优雅退出"""
+
+    def __init__(self, sock: socket.socket, args):
+        self.args = args
+        self.jobs = 0
+        self.lock = threading.Lock()
+        self.server = PoolWSGIServer(args.host, args.port, self.wsgi_app, args.threads,
+                                     args.request_timeout, fd=sock.fileno())
+
+    def wsgi_app(self, environ, start_response):
+        try:
+            return app(environ, start_response)
+        finally:
+            if environ.get('PATH_INFO', '').startswith('/mask/'):
+                with self.lock:
+                    self.jobs += 1
+                    if self.args.max_jobs and self.jobs >= self.args.max_jobs:
+                        self.server.stop()
+
+    def stop(self, *_):
+        self.server.stop()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        if self.args.ocr_threads and 'torch' in sys.modules:
+            sys.modules['torch'].set_num_threads(self.args.ocr_threads)
+        self.server.serve_forever(poll_interval=self.server.poll_interval)
+        if not self.server.drain(self.args.graceful_timeout):
+            print(f"工作进程 {os.getpid()} 等待进行中的请求超时，强制退出")
+        print(f"工作进程 {os.getpid()} 退出（已处理遮盖任务 {self.jobs} 个）")
+
+
+def spawn_worker(sock: socket.socket, args) -> int:
+    pid = os.fork()
+    if pid == 0:
+        # 不继承主进程的信号处理；Ctrl+C 由主进程统一处理
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        code = 0
+        try:
+            Worker(sock, args).run()
+        except Exception as e:
+            print(f"工作进程 {os.getpid()} 异常退出: {e}")
+            code = 1
+        finally:
+            # os._exit 不会刷新缓冲区，输出为管道时需手动刷新以免丢失日志
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PDF隐私信息遮盖系统 - 生产模式服务')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=6001)
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WORKERS', 2)),
+                        help='工作进程数')
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('THREADS', 2)),
+                        help='每个工作进程的请求线程数')
+    parser.add_argument('--max-jobs', type=int, default=int(os.environ.get('MAX_JOBS', 200)),
+                        help='工作进程处理该数量的遮盖任务后重启，0表示不重启')
+    parser.add_argument('--graceful-timeout', type=float, default=300.0,
+                        help='关闭时等待进行中任务完成的最长秒数，超时后强制结束')
+    parser.add_argument('--request-timeout', type=float, default=float(os.environ.get('REQUEST_TIMEOUT', 30)),
+                        help='连接读写超时秒数，空闲连接超时后释放线程')
+    parser.add_argument('--ocr-threads', type=int, default=None,
+                        help='每个工作进程的PyTorch推理线程数，默认按CPU核数平均分配')
+    args = parser.parse_args()
+    args.workers = max(1, args.workers)
+    args.threads = max(1, args.threads)
+    if args.ocr_threads is None:
+        args.ocr_threads = max(1, (os.cpu_count() or 1) // args.workers)
+
+    # 在fork前加载OCR模型，工作进程通过写时复制共享权重
+    print(f"预加载OCR后端: {app.config['OCR_BACKEND']}")
+    if get_ocr_backend(app.config['OCR_BACKEND']) is None:
+        print(f"OCR后端加载失败，服务未启动: {app.config['OCR_BACKEND']}")
+        sys.exit(1)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(128)
+
+    # 冻结已有对象，避免工作进程中的垃圾回收触碰共享内存页导致复制
+    gc.collect()
+    gc.freeze()
+
+    workers = {spawn_worker(sock, args) for _ in range(args.workers)}
+    print(f"服务已启动: http://{args.host}:{args.port}（工作进程 {args.workers} 个，每个 {args.threads} 线程）")
+
+    deadline = None
+
+    def handle_stop(signum, frame):
+        nonlocal deadline
+        if deadline is None:
+            print("正在关闭，等待进行中的遮盖任务完成...")
+            deadline = time.monotonic() + args.graceful_timeout
+            for pid in workers:
+                os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    while workers:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            if deadline is not None and time.monotonic() > deadline:
+                for wpid in workers:
+                    os.kill(wpid, signal.SIGKILL)
+                deadline = float('inf')
+            time.sleep(0.5)
+            continue
+        workers.discard(pid)
+        if deadline is None:
+            # 任务数达到上限或异常退出的工作进程，重新拉起；异常退出时稍作等待避免反复fork
+            if status != 0:
+                time.sleep(1)
+            workers.add(spawn_worker(sock, args))
+
+    sock.close()
+    print("服务已关闭")
+
+
+if __name__ == '__main__':
+    main()